@@ -0,0 +1,45 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Небольшой потокобезопасный кэш с ограничением по размеру (LRU) и времени жизни записей.
+    Синхронные эндпоинты FastAPI выполняются в пуле потоков, поэтому нужна блокировка.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys) -> dict:
+        """Возвращает найденные и не устаревшие значения в виде {ключ: значение}"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                item = self._data.get(key)
+                if item is None:
+                    continue
+                value, expires_at = item
+                if expires_at <= now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, items: dict):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (value, expires_at)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -1,3 +1,5 @@
+from typing import Optional
+from sqlalchemy import or_ # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from passlib.context import CryptContext # type: ignore
 from . import models, schemas
@@ -56,9 +58,30 @@ class UserCRUD:
         """Находит пользователя по ID"""
         return self.db.query(models.User).filter(models.User.id == user_id).first()
     
-    def get_all_users(self, skip: int = 0, limit: int = 100):
-        """Возвращает список всех пользователей"""
-        return self.db.query(models.User).offset(skip).limit(limit).all()
+    def get_all_users(self, after_id: Optional[int] = None, limit: int = 100, skip: int = 0):
+        """
+        Возвращает страницу пользователей, упорядоченную по id.
+        Keyset-пагинация: следующая страница начинается после after_id (последний id
+        предыдущей страницы), поэтому запрос идет по индексу первичного ключа
+        и не замедляется с глубиной. skip оставлен для старых клиентов.
+        """
+        query = self.db.query(models.User).order_by(models.User.id)
+        if after_id is not None:
+            query = query.filter(models.User.id > after_id)
+        elif skip:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    def get_users_batch(self, ids: list[int], usernames: list[str]):
+        """Находит пользователей по списку id и/или username одним запросом (IN по индексам)"""
+        conditions = []
+        if ids:
+            conditions.append(models.User.id.in_(ids))
+        if usernames:
+            conditions.append(models.User.username.in_(usernames))
+        if not conditions:
+            return []
+        return self.db.query(models.User).filter(or_(*conditions)).all()
     
     def authenticate_user(self, email: str, password: str):
         """Аутентифицирует пользователя по email и паролю"""
@@ -0,0 +1,385 @@
+# Модуль продублирован в auth_service/app/rate_limit.py и task_service/rate_limit.py
+# (сервисы собираются в отдельные образы) - изменения вносить в обе копии одинаково.
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+from jose import JWTError, jwt # type: ignore
+from starlette.responses import JSONResponse # type: ignore
+
+logger = logging.getLogger("RateLimit")
+
+GLOBAL_KEY = "__global__"
+
+
+@dataclass
+class RateLimitConfig:
+    """Настройки ограничения нагрузки (читаются из переменных окружения)"""
+    enabled: bool = True
+    # Лимит на одного клиента (user id из JWT или IP): токенов в секунду и размер "всплеска"
+    client_rate: float = 10.0
+    client_burst: float = 20.0
+    # Общий лимит на весь процесс
+    global_rate: float = 500.0
+    global_burst: float = 1000.0
+    # Адаптивный лимит одновременных запросов
+    initial_concurrency: int = 32
+    min_concurrency: int = 4
+    max_concurrency: int = 128
+    max_queue: int = 100
+    queue_timeout: float = 2.0
+    target_latency: float = 0.25
+    # Маршрут считается перегруженным, если его задержка больше target_latency
+    # и больше собственной базовой задержки маршрута в latency_tolerance раз
+    latency_tolerance: float = 2.0
+    # Как часто писать в лог сводку об отклоненных запросах и ошибках Redis
+    reject_log_interval: float = 10.0
+    # Максимум клиентов в локальном хранилище бакетов (LRU)
+    max_keys: int = 100_000
+    # Если задан - бакеты хранятся в Redis и общие для всех реплик
+    redis_url: Optional[str] = None
+    # Стоимость запроса по (метод, путь); по умолчанию 1
+    route_costs: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls, route_costs: Optional[dict] = None) -> "RateLimitConfig":
+        return cls(
+            enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes"),
+            client_rate=float(os.getenv("RATE_LIMIT_CLIENT_RATE", "10")),
+            client_burst=float(os.getenv("RATE_LIMIT_CLIENT_BURST", "20")),
+            global_rate=float(os.getenv("RATE_LIMIT_GLOBAL_RATE", "500")),
+            global_burst=float(os.getenv("RATE_LIMIT_GLOBAL_BURST", "1000")),
+            initial_concurrency=int(os.getenv("RATE_LIMIT_INITIAL_CONCURRENCY", "32")),
+            min_concurrency=int(os.getenv("RATE_LIMIT_MIN_CONCURRENCY", "4")),
+            max_concurrency=int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "128")),
+            max_queue=int(os.getenv("RATE_LIMIT_MAX_QUEUE", "100")),
+            queue_timeout=float(os.getenv("RATE_LIMIT_QUEUE_TIMEOUT", "2.0")),
+            target_latency=float(os.getenv("RATE_LIMIT_TARGET_LATENCY_MS", "250")) / 1000,
+            latency_tolerance=float(os.getenv("RATE_LIMIT_LATENCY_TOLERANCE", "2.0")),
+            reject_log_interval=float(os.getenv("RATE_LIMIT_REJECT_LOG_INTERVAL", "10")),
+            max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")),
+            redis_url=os.getenv("RATE_LIMIT_REDIS_URL") or None,
+            route_costs=route_costs or {},
+        )
+
+
+class LocalBucketStore:
+    """
+    Token bucket в памяти процесса.
+    Все операции выполняются в event loop без await, поэтому блокировки не нужны.
+    Хранилище ограничено max_keys: давно не встречавшиеся клиенты вытесняются (LRU).
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> tuple[bool, float]:
+        """Списывает cost токенов. Возвращает (разрешено, через сколько секунд повторить)"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = burst
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens, last = bucket
+            tokens = min(burst, tokens + (now - last) * rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            return True, 0.0
+        self._buckets[key] = (tokens, now)
+        return False, (cost - tokens) / rate
+
+
+class RedisBucketStore:
+    """
+    Token bucket в Redis - лимиты общие для всех реплик сервиса.
+    Требует пакет redis (не входит в requirements.txt). При недоступности Redis
+    запросы пропускаются (fail-open), чтобы лимитер не стал точкой отказа.
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local wait = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        wait = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return {allowed, tostring(wait)}
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:", error_log_interval: float = 10.0):
+        self.url = url
+        self.prefix = prefix
+        self.error_log_interval = error_log_interval
+        # Клиент создается лениво - уже внутри рабочего процесса, а не до fork
+        self._script = None
+        self._errors = 0
+        self._last_error_log = None
+
+    def _get_script(self):
+        if self._script is None:
+            import redis.asyncio as redis # type: ignore
+            client = redis.from_url(self.url)
+            self._script = client.register_script(self.SCRIPT)
+        return self._script
+
+    async def take(self, key: str, cost: float, rate: float, burst: float) -> tuple[bool, float]:
+        try:
+            allowed, wait = await self._get_script()(
+                keys=[self.prefix + key],
+                args=[rate, burst, cost, time.time()],
+            )
+            return bool(int(allowed)), float(wait)
+        except Exception as e:
+            self._log_error(e)
+            return True, 0.0
+
+    def _log_error(self, error: Exception):
+        # Пока Redis недоступен, ошибка возникает на каждом запросе - пишем не чаще раза за интервал
+        self._errors += 1
+        now = time.monotonic()
+        if self._last_error_log is None or now - self._last_error_log >= self.error_log_interval:
+            logger.warning(f"Redis недоступен, лимит не применен (ошибок: {self._errors}): {error}")
+            self._errors = 0
+            self._last_error_log = now
+
+
+class RouteLatency:
+    """Задержка одного маршрута: сглаженная текущая и базовая (без нагрузки)"""
+
+    __slots__ = ("ewma", "baseline")
+
+    def __init__(self):
+        self.ewma: Optional[float] = None
+        self.baseline: Optional[float] = None
+
+    def observe(self, latency: float, unloaded: bool):
+        self.ewma = latency if self.ewma is None else 0.9 * self.ewma + 0.1 * latency
+        # База считается только по ответам, полученным без очереди на CPU: иначе всплеск,
+        # начавшийся при холодном старте, сам стал бы "нормой". База сразу опускается до
+        # самого быстрого ответа и медленно подтягивается вверх вслед за ростом данных
+        if not unloaded:
+            return
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        else:
+            self.baseline = 0.995 * self.baseline + 0.005 * latency
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Ограничение числа одновременно обрабатываемых запросов (AIMD, как в TCP).
+    Задержка каждого маршрута сравнивается с его собственной базовой задержкой (измеренной,
+    пока одновременных запросов не больше min_concurrency), поэтому медленный по природе
+    /login (bcrypt) участвует в подстройке наравне с быстрыми чтениями. Маршрут перегружен,
+    если его сглаженная задержка выше и target_latency, и базы, умноженной на
+    latency_tolerance (пока база неизвестна - просто выше target_latency). Тогда лимит
+    уменьшается пропорционально превышению (в 0.9-0.5 раза, не чаще одного раза за время
+    ответа), и пока перегрузка не прошла, ответы других маршрутов его не увеличивают;
+    иначе лимит растет примерно на 1 за "окно".
+    Запросы сверх лимита ждут в очереди; при переполнении очереди или таймауте - отказ.
+    """
+
+    # Максимум маршрутов, для которых хранится статистика задержки (LRU)
+    MAX_ROUTES = 1024
+
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self.limit = float(config.initial_concurrency)
+        self.in_flight = 0
+        self.routes: OrderedDict = OrderedDict()
+        self._last_decrease = 0.0
+        self._overloaded_until = 0.0
+        self._waiters: deque = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.config.max_queue:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.config.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            # wait_for мог отменить ожидание, когда слот уже был выдан - возвращаем его
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            return False
+        except asyncio.CancelledError:
+            # Клиент ушел, а слот уже был выдан - возвращаем его
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, latency: Optional[float], route=None, concurrency: int = 1):
+        """
+        Возвращает слот. latency - время обработки запроса маршрута route,
+        concurrency - сколько запросов выполнялось одновременно в момент его старта
+        """
+        # Нагрузка за время запроса - большая из нагрузок в начале и в конце
+        concurrency = max(concurrency, self.in_flight)
+        self.in_flight -= 1
+        if latency is not None:
+            self._adjust(route, latency, concurrency)
+        self._wake()
+
+    def _route_stats(self, route) -> RouteLatency:
+        stats = self.routes.get(route)
+        if stats is None:
+            if len(self.routes) >= self.MAX_ROUTES:
+                self.routes.popitem(last=False)
+            stats = self.routes[route] = RouteLatency()
+        else:
+            self.routes.move_to_end(route)
+        return stats
+
+    def _adjust(self, route, latency: float, concurrency: int):
+        cfg = self.config
+        stats = self._route_stats(route)
+        stats.observe(latency, unloaded=concurrency <= cfg.min_concurrency)
+        threshold = cfg.target_latency
+        if stats.baseline is not None:
+            threshold = max(threshold, stats.baseline * cfg.latency_tolerance)
+        now = time.monotonic()
+        if stats.ewma > threshold:
+            self._overloaded_until = now + stats.ewma
+            if now - self._last_decrease >= stats.ewma:
+                factor = min(0.9, max(0.5, threshold / stats.ewma))
+                self.limit = max(cfg.min_concurrency, self.limit * factor)
+                self._last_decrease = now
+        elif now >= self._overloaded_until:
+            self.limit = min(cfg.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware для защиты сервиса от перегрузки:
+    1. token bucket на клиента (user id из JWT, иначе IP) с учетом стоимости маршрута -> 429;
+    2. общий token bucket процесса -> 503;
+    3. адаптивный лимит одновременных запросов с ограниченной очередью -> 503.
+    Все отказы содержат заголовок Retry-After. Отказы не логируются по одному:
+    через reject_log_interval секунд после первого отказа пишется сводка по кодам ответа.
+    """
+
+    def __init__(self, app, config: RateLimitConfig, jwt_secret: str, jwt_algorithm: str = "HS256"):
+        self.app = app
+        self.config = config
+        self.jwt_secret = jwt_secret
+        self.jwt_algorithm = jwt_algorithm
+        if config.redis_url:
+            self.store = RedisBucketStore(config.redis_url, error_log_interval=config.reject_log_interval)
+        else:
+            self.store = LocalBucketStore(config.max_keys)
+        self.concurrency = AdaptiveConcurrencyLimiter(config)
+        self.rejected: Counter = Counter()
+        self._reject_log_scheduled = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        cfg = self.config
+        cost = cfg.route_costs.get((scope["method"], scope["path"]), 1)
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after = await self.store.take(self._client_key(scope), cost, cfg.client_rate, cfg.client_burst)
+        if not allowed:
+            await self._reject(scope, receive, send, 429, "Слишком много запросов", retry_after)
+            return
+
+        allowed, retry_after = await self.store.take(GLOBAL_KEY, cost, cfg.global_rate, cfg.global_burst)
+        if not allowed:
+            await self._reject(scope, receive, send, 503, "Сервис перегружен", retry_after)
+            return
+
+        if not await self.concurrency.acquire():
+            await self._reject(scope, receive, send, 503, "Сервис перегружен", cfg.queue_timeout)
+            return
+
+        concurrency = self.concurrency.in_flight
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # После маршрутизации в scope есть endpoint - путь с id не плодит отдельные маршруты
+            route = (scope["method"], scope.get("endpoint") or scope["path"])
+            self.concurrency.release(time.monotonic() - started, route, concurrency)
+
+    def _client_key(self, scope) -> str:
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    try:
+                        payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+                        if payload.get("sub") is not None:
+                            return f"user:{payload['sub']}"
+                    except JWTError:
+                        pass
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def _reject(self, scope, receive, send, status_code: int, detail: str, retry_after: float):
+        retry_after = max(1, math.ceil(retry_after))
+        self.rejected[status_code] += 1
+        if not self._reject_log_scheduled:
+            # Сводка пишется по таймеру, чтобы попали и отказы в конце всплеска
+            self._reject_log_scheduled = True
+            asyncio.get_running_loop().call_later(self.config.reject_log_interval, self._log_rejections)
+        response = JSONResponse(
+            status_code=status_code,
+            content={"detail": detail},
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
+
+    def _log_rejections(self):
+        summary = ", ".join(f"{code}: {count}" for code, count in sorted(self.rejected.items()))
+        logger.warning(f"Отклонено запросов за {self.config.reject_log_interval:.0f} с - {summary}")
+        self.rejected.clear()
+        self._reject_log_scheduled = False
@@ -21,6 +21,13 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True  # Позволяет создавать из объектов SQLAlchemy
 
+MAX_BATCH_SIZE = 500
+
+class UserBatchRequest(BaseModel):
+    """Схема запроса пакетного поиска пользователей по id и/или username"""
+    ids: list[int] = Field(default_factory=list, max_length=MAX_BATCH_SIZE, example=[1, 2, 3])
+    usernames: list[str] = Field(default_factory=list, max_length=MAX_BATCH_SIZE, example=["johndoe"])
+
 # ========== ДОБАВЛЕННЫЕ СХЕМЫ ДЛЯ JWT ==========
 
 class Token(BaseModel):
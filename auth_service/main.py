@@ -1,10 +1,11 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request # type: ignore
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status, Request # type: ignore
 from fastapi.responses import JSONResponse # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
 from fastapi.security import OAuth2PasswordRequestForm # type: ignore
 from fastapi.exceptions import RequestValidationError # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from datetime import timedelta
+from typing import Optional
 import logging
 import os
 
@@ -12,6 +13,9 @@ import os
 from app.database import get_db, engine
 from app.models import Base
 from app import schemas, crud, auth, dependencies
+from app.config import settings
+from app.rate_limit import RateLimitMiddleware, RateLimitConfig
+from app.cache import TTLCache
 
 # Настройка логирования (Требование Шага 3)
 logging.basicConfig(
@@ -27,6 +31,21 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Ограничение нагрузки: /login и /register дорогие из-за bcrypt.
+# Добавляется до CORS, чтобы ответы 429/503 тоже получали CORS-заголовки
+app.add_middleware(
+    RateLimitMiddleware,
+    config=RateLimitConfig.from_env(route_costs={
+        ("GET", "/"): 0,
+        ("POST", "/login"): 5,
+        ("POST", "/register"): 5,
+        ("GET", "/users"): 2,
+        ("POST", "/users/batch"): 2,
+    }),
+    jwt_secret=settings.JWT_SECRET_KEY,
+    jwt_algorithm=settings.JWT_ALGORITHM,
+)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -34,11 +53,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
+    # Курсор пагинации и Retry-After должны быть доступны браузерным клиентам
+    expose_headers=["X-Next-After-Id", "Retry-After"],
 )
 
 # Создаем таблицы в БД
 Base.metadata.create_all(bind=engine)
 
+# Кэш для /users/batch: ключи ("id", 1) и ("username", "johndoe")
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
 # ========== ОБРАБОТЧИКИ ОШИБОК (Защита от 500-х ошибок) ==========
 
 @app.exception_handler(RequestValidationError)
@@ -109,9 +133,53 @@ def read_users_me(current_user: schemas.UserResponse = Depends(dependencies.get_
     return current_user
 
 @app.get("/users", response_model=list[schemas.UserResponse], tags=["Users"])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_users(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: Session = Depends(get_db)
+):
+    """
+    Постраничный список пользователей. Для следующей страницы передайте after_id
+    из заголовка X-Next-After-Id (он есть, только если страница заполнена целиком).
+    """
     user_crud = crud.UserCRUD(db)
-    return user_crud.get_all_users(skip=skip, limit=limit)
+    users = user_crud.get_all_users(after_id=after_id, limit=limit, skip=skip)
+    if len(users) == limit:
+        response.headers["X-Next-After-Id"] = str(users[-1].id)
+    return users
+
+@app.post("/users/batch", response_model=list[schemas.UserResponse], tags=["Users"])
+def read_users_batch(request: schemas.UserBatchRequest, db: Session = Depends(get_db)):
+    """Пакетный поиск пользователей по id и/или username (до 500 за запрос)"""
+    if len(request.ids) + len(request.usernames) > schemas.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Не более {schemas.MAX_BATCH_SIZE} id и username в одном запросе",
+        )
+    ids = list(dict.fromkeys(request.ids))
+    usernames = list(dict.fromkeys(request.usernames))
+
+    cached = user_cache.get_many([("id", i) for i in ids] + [("username", u) for u in usernames])
+    found = {user.id: user for user in cached.values()}
+
+    missing_ids = [i for i in ids if ("id", i) not in cached]
+    missing_usernames = [u for u in usernames if ("username", u) not in cached]
+    if missing_ids or missing_usernames:
+        user_crud = crud.UserCRUD(db)
+        users = [
+            schemas.UserResponse.model_validate(user)
+            for user in user_crud.get_users_batch(missing_ids, missing_usernames)
+        ]
+        entries = {}
+        for user in users:
+            entries[("id", user.id)] = user
+            entries[("username", user.username)] = user
+            found[user.id] = user
+        user_cache.set_many(entries)
+
+    return sorted(found.values(), key=lambda user: user.id)
 
 @app.on_event("startup")
 async def startup_event():
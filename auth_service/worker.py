@@ -0,0 +1,5 @@
+from uvicorn.workers import UvicornWorker # type: ignore
+
+class UvloopWorker(UvicornWorker):
+    """Воркер gunicorn на uvicorn с явно заданными uvloop и httptools"""
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
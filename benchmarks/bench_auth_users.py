@@ -0,0 +1,167 @@
+"""
+Бенчмарк списка и пакетного поиска пользователей Auth Service.
+
+Сравнивает OFFSET- и keyset-пагинацию UserCRUD.get_all_users на разной глубине,
+пакетный поиск get_users_batch против N отдельных запросов get_user_by_id,
+а также эндпоинт POST /users/batch с холодным (очищенным перед каждым запросом)
+и прогретым TTL-кэшем.
+
+Запуск из корня репозитория (зависимости: benchmarks/requirements.txt):
+    python benchmarks/bench_auth_users.py --users 1000000 --output bench_users.json
+
+По умолчанию используется файл SQLite; для Postgres передайте --database-url.
+Повторный запуск с тем же файлом не пересоздает данные.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stack import ROOT, sync_id_sequence # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Куда записать JSON с результатами")
+    return parser.parse_args()
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+def seed_users(engine, models, count: int):
+    """Заполняет таблицу users быстрыми пакетными вставками (один общий хеш пароля)"""
+    from sqlalchemy import func, select # type: ignore
+
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.max(models.User.id))).scalar() or 0
+    if existing >= count:
+        return
+
+    print(f"Заполнение users: {existing} -> {count}")
+    fake_hash = "$2b$12$" + "x" * 53
+    now = datetime.now()
+    chunk = 50_000
+    with engine.begin() as conn:
+        for start in range(existing + 1, count + 1, chunk):
+            rows = [
+                {
+                    "id": i,
+                    "email": f"user{i}@example.com",
+                    "username": f"user{i}",
+                    "hashed_password": fake_hash,
+                    "is_active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(start, min(start + chunk, count + 1))
+            ]
+            conn.execute(models.User.__table__.insert(), rows)
+        sync_id_sequence(conn, models.User.__table__)
+
+
+def bench_batch_endpoint(ids: list, usernames: list, repeat: int) -> dict:
+    """POST /users/batch через ASGI-приложение: кэш очищается перед каждым запросом или прогрет"""
+    from fastapi.testclient import TestClient # type: ignore
+    import main as auth_main
+
+    # Логи на каждый запрос искажают замеры
+    for name in ("AuthService", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    # Поровну id и username, в пределах лимита одного запроса
+    half = auth_main.schemas.MAX_BATCH_SIZE // 2
+    body = {"ids": ids[:half], "usernames": usernames[:half]}
+    client = TestClient(auth_main.app)
+
+    def request():
+        response = client.post("/users/batch", json=body)
+        response.raise_for_status()
+
+    def cold():
+        auth_main.user_cache.clear()
+        request()
+
+    results = {"endpoint_cold": timed(cold, repeat)}
+    request()
+    results["endpoint_warm"] = timed(request, repeat)
+    return results
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(ROOT, f'bench_auth_{args.users}.db')}"
+    # Модули сервиса создают движок при импорте, поэтому URL задается до импорта
+    os.environ["DATABASE_URL"] = database_url
+    # Замеряется сам эндпоинт, а не ограничение нагрузки перед ним
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    sys.path.insert(0, os.path.join(ROOT, "auth_service"))
+    from app.database import engine, SessionLocal
+    from app import models, crud
+
+    models.Base.metadata.create_all(bind=engine)
+    seed_users(engine, models, args.users)
+
+    rnd = random.Random(args.seed)
+    results = {"users": args.users, "database": engine.dialect.name, "pagination": [], "batch": {}, "endpoint": {}}
+
+    db = SessionLocal()
+    try:
+        user_crud = crud.UserCRUD(db)
+        for depth in (0, 10_000, 100_000, args.users // 2, args.users - args.page_size):
+            if depth > args.users - args.page_size:
+                continue
+            offset = timed(lambda: user_crud.get_all_users(skip=depth, limit=args.page_size), args.repeat)
+            keyset = timed(lambda: user_crud.get_all_users(after_id=depth, limit=args.page_size), args.repeat)
+            results["pagination"].append({"depth": depth, "offset": offset, "keyset": keyset})
+            print(f"depth={depth:>9}  offset p50={offset['p50_ms']:>9} ms  keyset p50={keyset['p50_ms']:>7} ms")
+
+        ids = rnd.sample(range(1, args.users + 1), min(args.batch_size, args.users))
+        usernames = [f"user{i}" for i in rnd.sample(range(1, args.users + 1), min(args.batch_size, args.users))]
+        results["batch"] = {
+            "size": len(ids),
+            "single_by_id": timed(lambda: [user_crud.get_user_by_id(i) for i in ids], max(1, args.repeat // 4)),
+            "batch_by_id": timed(lambda: user_crud.get_users_batch(ids, []), args.repeat),
+            "batch_by_username": timed(lambda: user_crud.get_users_batch([], usernames), args.repeat),
+        }
+        for name, stats in results["batch"].items():
+            if name != "size":
+                print(f"{name:<18} p50={stats['p50_ms']} ms")
+    finally:
+        db.close()
+
+    results["endpoint"] = bench_batch_endpoint(ids, usernames, args.repeat)
+    for name, stats in results["endpoint"].items():
+        print(f"{name:<18} p50={stats['p50_ms']} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Бенчмарк масштабирования production-режима (gunicorn + uvicorn) по числу воркеров.
+
+Для каждого числа воркеров Auth Service и Task Service запускаются отдельными
+процессами gunicorn с их gunicorn.conf.py (WEB_CONCURRENCY=N) на свободных портах,
+после чего сценарии из workloads.py гоняются по HTTP. Нагрузку генерируют
+несколько процессов-клиентов, чтобы однопоточный клиент не стал узким местом.
+
+Запуск из корня репозитория (зависимости: benchmarks/requirements.txt):
+    python benchmarks/bench_scaling.py --workers 1,2,4 --output bench_scaling.json
+
+По умолчанию базы - файлы SQLite: это годится для сценариев чтения и входа,
+но записи из нескольких процессов упираются в блокировку файла. Для честных
+замеров записи передайте --auth-database-url / --task-database-url на Postgres.
+Непустые таблицы не перезаписываются без --reset.
+
+Сценарии записи (write_burst) не поддерживаются: Task Service под gunicorn
+публикует события в настоящий RabbitMQ, а брокер в памяти есть только в run.py.
+Логи серверов пишутся в <workdir>/<service>-<workers>w.log.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run import git_revision # noqa: E402
+from stack import BENCH_JWT_SECRET, ROOT, boot_stack, seed # noqa: E402
+from workloads import SCENARIOS, Recorder, collect_scenario # noqa: E402
+
+# Сценарии, которые пишут в базу и публикуют события в RabbitMQ
+WRITE_SCENARIOS = {"write_burst"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,2,4,{os.cpu_count() or 1}", help="Число воркеров через запятую")
+    parser.add_argument("--scenarios", default="login_storm,poll_reads,filter_mix")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=64, help="Всего одновременных клиентов")
+    parser.add_argument("--client-processes", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--auth-database-url", default=None)
+    parser.add_argument("--task-database-url", default=None)
+    parser.add_argument("--reset", action="store_true", help="Очистить непустые таблицы перед заполнением")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(service: str, workers: int, port: int, database_url: str, log_path: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        JWT_SECRET_KEY=BENCH_JWT_SECRET,
+        WEB_CONCURRENCY=str(workers),
+        PORT=str(port),
+        RATE_LIMIT_ENABLED="false",
+        ARCHIVE_ENABLED="false",
+        # Перезапуски воркеров посреди замера искажают результат
+        MAX_REQUESTS="0",
+    )
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+            cwd=os.path.join(ROOT, service),
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    process.log_path = log_path
+    return process
+
+
+def log_tail(path: str, lines: int = 20) -> str:
+    try:
+        with open(path, errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+    except OSError:
+        return ""
+
+
+def wait_ready(process: subprocess.Popen, port: int, timeout: float = 60.0):
+    import httpx # type: ignore
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f"gunicorn завершился с кодом {process.returncode}, лог: {process.log_path}\n{log_tail(process.log_path)}"
+            )
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(
+        f"Сервис на порту {port} не запустился за {timeout} с, лог: {process.log_path}\n{log_tail(process.log_path)}"
+    )
+
+
+def stop_service(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def client_process(name: str, ports: dict, users: list, duration: float, warmup: float, concurrency: int, seed: int):
+    """Один процесс-генератор нагрузки; возвращает сырые замеры для объединения"""
+    import httpx # type: ignore
+
+    async def run():
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{ports['auth']}", limits=limits) as auth_client, \
+                httpx.AsyncClient(base_url=f"http://127.0.0.1:{ports['task']}", limits=limits) as task_client:
+            clients = {"auth": auth_client, "task": task_client}
+            return await collect_scenario(SCENARIOS[name], clients, users, duration, concurrency, seed, warmup)
+
+    return asyncio.run(run())
+
+
+def run_scenario_distributed(pool, name: str, ports: dict, users: list, args) -> dict:
+    per_process = max(1, args.concurrency // args.client_processes)
+    jobs = [
+        pool.apply_async(client_process, (name, ports, users, args.duration, args.warmup, per_process, args.seed * 100 + n))
+        for n in range(args.client_processes)
+    ]
+    merged = Recorder()
+    elapsed = 0.0
+    for job in jobs:
+        part, process_elapsed = job.get()
+        merged.merge(part)
+        elapsed = max(elapsed, process_elapsed)
+    return merged.report(elapsed)
+
+
+def main():
+    args = parse_args()
+    worker_counts = sorted({int(n) for n in args.workers.split(",") if n.strip()})
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Неизвестные сценарии: {', '.join(unknown)}")
+    writes = [name for name in names if name in WRITE_SCENARIOS]
+    if writes:
+        sys.exit(
+            f"Сценарии записи не поддерживаются в режиме gunicorn (нужен RabbitMQ): {', '.join(writes)}. "
+            "Используйте benchmarks/run.py"
+        )
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="task_manager_scaling_")
+    auth_url = args.auth_database_url or f"sqlite:///{os.path.join(workdir, 'auth.db')}"
+    task_url = args.task_database_url or f"sqlite:///{os.path.join(workdir, 'task.db')}"
+
+    # Данные готовятся один раз в этом процессе, серверы gunicorn читают те же базы
+    stack = boot_stack(workdir, auth_url, task_url)
+    try:
+        seed(stack, args.users, args.tasks_per_user, args.seed, reset=args.reset)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    stack.broker.close()
+
+    results = {}
+    with multiprocessing.get_context("spawn").Pool(args.client_processes) as pool:
+        for workers in worker_counts:
+            ports = {"auth": free_port(), "task": free_port()}
+            processes = {
+                service: start_service(
+                    f"{service}_service", workers, ports[service], url,
+                    os.path.join(workdir, f"{service}_service-{workers}w.log"),
+                )
+                for service, url in (("auth", auth_url), ("task", task_url))
+            }
+            try:
+                for service, process in processes.items():
+                    wait_ready(process, ports[service])
+                results[workers] = {}
+                for name in names:
+                    report = run_scenario_distributed(pool, name, ports, stack.users, args)
+                    results[workers][name] = report
+                    print(
+                        f"workers={workers:<3} {name:<12} {report['throughput_rps']:>9} rps  "
+                        f"p50={report['latency_ms']['p50']} p99={report['latency_ms']['p99']} ms  errors={report['errors']}",
+                        file=sys.stderr,
+                    )
+            finally:
+                for process in processes.values():
+                    stop_service(process)
+
+    baseline = results[worker_counts[0]]
+    speedup = {
+        workers: {
+            name: round(report["throughput_rps"] / baseline[name]["throughput_rps"], 2) if baseline[name]["throughput_rps"] else None
+            for name, report in scenarios.items()
+        }
+        for workers, scenarios in results.items()
+    }
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mode": "gunicorn",
+            "params": {
+                "workers": worker_counts,
+                "users": args.users,
+                "tasks_per_user": args.tasks_per_user,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "concurrency": args.concurrency,
+                "client_processes": args.client_processes,
+                "seed": args.seed,
+                "auth_database": "postgres" if args.auth_database_url else "sqlite",
+                "task_database": "postgres" if args.task_database_url else "sqlite",
+            },
+        },
+        "results": {str(workers): scenarios for workers, scenarios in results.items()},
+        "speedup": {str(workers): values for workers, values in speedup.items()},
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
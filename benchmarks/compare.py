@@ -0,0 +1,65 @@
+"""
+Сравнение двух отчетов benchmarks/run.py (например, до и после изменения).
+
+    python benchmarks/compare.py bench_base.json bench_head.json [--threshold 10]
+
+Печатает изменение пропускной способности и p50/p95/p99 по каждому сценарию и операции.
+Код возврата 1, если какая-либо метрика ухудшилась больше чем на threshold процентов.
+"""
+import argparse
+import json
+import sys
+
+
+def delta(base: float, head: float) -> float:
+    if not base:
+        return 0.0
+    return (head - base) / base * 100
+
+
+def compare_entry(label: str, base: dict, head: dict, threshold: float) -> bool:
+    regressed = False
+    cells = []
+    metrics = [("rps", base["throughput_rps"], head["throughput_rps"], True)]
+    for p in ("p50", "p95", "p99"):
+        metrics.append((p, base["latency_ms"][p], head["latency_ms"][p], False))
+    for name, old, new, higher_is_better in metrics:
+        change = delta(old, new)
+        worse = -change if higher_is_better else change
+        mark = " !" if worse > threshold else ""
+        regressed = regressed or worse > threshold
+        cells.append(f"{name} {old:>9} -> {new:<9} ({change:+6.1f}%){mark}")
+    print(f"{label:<32} " + "  ".join(cells))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Допустимое ухудшение, %%")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base: {base['meta'].get('commit')}  head: {head['meta'].get('commit')}")
+    regressed = False
+    for name, head_report in head["scenarios"].items():
+        base_report = base["scenarios"].get(name)
+        if base_report is None:
+            print(f"{name:<32} нет в base")
+            continue
+        regressed |= compare_entry(name, base_report, head_report, args.threshold)
+        for op, head_op in head_report.get("operations", {}).items():
+            base_op = base_report.get("operations", {}).get(op)
+            if base_op is not None:
+                regressed |= compare_entry(f"  {op}", base_op, head_op, args.threshold)
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Нагрузочный бенчмарк всего стека (Auth + Task + Notification) в одном процессе.
+
+Сервисы поднимаются на локальных заменах (SQLite и брокер сообщений в памяти,
+см. stack.py), базы заполняются тестовыми данными, затем по очереди выполняются
+сценарии из workloads.py. Результат - JSON с пропускной способностью и
+перцентилями задержки, который можно сравнить между коммитами (compare.py).
+
+Запуск из корня репозитория (зависимости: benchmarks/requirements.txt):
+    python benchmarks/run.py --output bench_base.json
+    python benchmarks/run.py --scenarios poll_reads,filter_mix --users 5000 --duration 30
+
+Для эфемерного Postgres передайте --auth-database-url / --task-database-url.
+Непустые таблицы не перезаписываются: для повторного запуска на тех же базах нужен --reset.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stack import ROOT, boot_stack, seed # noqa: E402
+from workloads import SCENARIOS, run_scenario # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Через запятую: " + ", ".join(SCENARIOS))
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks-per-user", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="Секунд на сценарий")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="Каталог для баз SQLite (по умолчанию временный)")
+    parser.add_argument("--auth-database-url", default=None)
+    parser.add_argument("--task-database-url", default=None)
+    parser.add_argument("--reset", action="store_true", help="Очистить непустые таблицы перед заполнением")
+    parser.add_argument("--rate-limit", action="store_true", help="Не отключать ограничение нагрузки")
+    parser.add_argument("--archive-after-days", type=int, default=None,
+                        help="Перед замерами перенести в архив задачи, выполненные раньше N дней назад")
+    parser.add_argument("--output", default=None, help="Куда записать JSON (по умолчанию stdout)")
+    return parser.parse_args()
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+async def run_all(stack, args, names: list) -> dict:
+    import httpx # type: ignore
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=stack.auth_app), base_url="http://auth") as auth_client, \
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=stack.task_app), base_url="http://task") as task_client:
+        clients = {"auth": auth_client, "task": task_client}
+        for name in names:
+            published_before = stack.broker.published
+            emitted_before = stack.notification.coalescer.emitted
+            report = await run_scenario(
+                SCENARIOS[name], clients, stack.users,
+                duration=args.duration, concurrency=args.concurrency, seed=args.seed, warmup=args.warmup,
+            )
+            # Досылаем события, ожидающие окончания окна объединения, чтобы учесть их в этом сценарии
+            await asyncio.to_thread(
+                stack.broker.call_in_consumer, "task_notifications", stack.notification.flush_all_pending
+            )
+            report["amqp_published"] = stack.broker.published - published_before
+            report["notifications_emitted"] = stack.notification.coalescer.emitted - emitted_before
+            results[name] = report
+            print(
+                f"{name:<12} {report['throughput_rps']:>9} rps  "
+                f"p50={report['latency_ms']['p50']} p95={report['latency_ms']['p95']} p99={report['latency_ms']['p99']} ms  "
+                f"errors={report['errors']}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def main():
+    args = parse_args()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Неизвестные сценарии: {', '.join(unknown)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="task_manager_bench_")
+    # Сервисы печатают служебные сообщения через print; stdout оставляем только для отчета
+    with contextlib.redirect_stdout(sys.stderr):
+        stack = boot_stack(workdir, args.auth_database_url, args.task_database_url, rate_limit=args.rate_limit)
+
+        started = time.perf_counter()
+        try:
+            seed(stack, args.users, args.tasks_per_user, args.seed, reset=args.reset)
+        except RuntimeError as e:
+            sys.exit(str(e))
+        print(f"Данные подготовлены за {time.perf_counter() - started:.1f} с ({workdir})")
+
+        archived = 0
+        if args.archive_after_days is not None:
+            from archive import TaskArchiver
+            from database import SessionLocal, engine
+            archived = TaskArchiver(SessionLocal, engine, age_days=args.archive_after_days, max_batches=10**6).run_once()
+            print(f"В архив перенесено задач: {archived}")
+
+        scenarios = asyncio.run(run_all(stack, args, names))
+        stack.broker.close()
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mode": "in-process",
+            "params": {
+                "users": args.users,
+                "tasks_per_user": args.tasks_per_user,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "concurrency": args.concurrency,
+                "seed": args.seed,
+                "rate_limit": args.rate_limit,
+                "archive_after_days": args.archive_after_days,
+                "archived_tasks": archived,
+                "auth_database": "postgres" if args.auth_database_url else "sqlite",
+                "task_database": "postgres" if args.task_database_url else "sqlite",
+            },
+        },
+        "scenarios": scenarios,
+        "notifications": stack.notification.coalescer.stats(),
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
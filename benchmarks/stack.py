@@ -0,0 +1,280 @@
+"""
+Запуск всех трех сервисов в одном процессе на локальных заменах инфраструктуры.
+
+- Auth Service и Task Service получают собственные базы (по умолчанию файлы SQLite);
+- RabbitMQ заменяется брокером в памяти (FakeBroker): pika.BlockingConnection
+  подменяется, а сообщения из очереди task_notifications доставляются в callback
+  Notification Service фоновым потоком.
+
+Сервисы создают движки БД при импорте, поэтому переменные окружения задаются
+до загрузки модулей. У сервисов совпадают имена модулей main, поэтому они
+загружаются под уникальными именами (auth_main, task_main, notification_main).
+"""
+import importlib.util
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_JWT_SECRET = "benchmark-secret-key"
+BENCH_PASSWORD = "benchmark-password"
+
+
+class FakeBroker:
+    """Брокер сообщений в памяти: очереди по имени и потоки-потребители"""
+
+    def __init__(self):
+        self.queues: dict[str, queue.Queue] = {}
+        self.published = 0
+        self.delivered = 0
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def get_queue(self, name: str) -> queue.Queue:
+        with self._lock:
+            return self.queues.setdefault(name, queue.Queue())
+
+    def publish(self, routing_key: str, body):
+        with self._lock:
+            self.published += 1
+        self.get_queue(routing_key).put(body)
+
+    def consume(self, name: str, callback, on_idle=None, tick: float = 0.2):
+        """
+        Запускает поток, доставляющий сообщения очереди в callback в стиле pika.
+        on_idle вызывается в том же потоке не реже раза в tick секунд
+        (аналог цикла process_data_events в Notification Service).
+        """
+        q = self.get_queue(name)
+
+        def worker():
+            while True:
+                try:
+                    body = q.get(timeout=tick)
+                except queue.Empty:
+                    body = ...
+                if body is None:
+                    break
+                if callable(body):
+                    # Служебная задача от call_in_consumer
+                    body()
+                elif body is not ...:
+                    callback(None, None, None, body)
+                    with self._lock:
+                        self.delivered += 1
+                if on_idle is not None:
+                    on_idle()
+
+        thread = threading.Thread(target=worker, name=f"fake-amqp-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return thread
+
+    def call_in_consumer(self, name: str, fn, timeout: float = 60.0):
+        """
+        Выполняет fn в потоке-потребителе очереди после уже поставленных сообщений
+        и ждет завершения (обработчики Notification Service не потокобезопасны).
+        """
+        done = threading.Event()
+
+        def task():
+            try:
+                fn()
+            finally:
+                done.set()
+
+        self.get_queue(name).put(task)
+        done.wait(timeout)
+
+    def close(self):
+        """Останавливает потребителей, дождавшись обработки поставленных сообщений"""
+        for q in list(self.queues.values()):
+            q.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+class FakeChannel:
+    def __init__(self, broker: FakeBroker):
+        self.broker = broker
+
+    def queue_declare(self, queue: str, **kwargs):
+        self.broker.get_queue(queue)
+
+    def basic_publish(self, exchange: str, routing_key: str, body, properties=None, **kwargs):
+        self.broker.publish(routing_key, body)
+
+    def close(self):
+        pass
+
+
+class FakeBlockingConnection:
+    """Подмена pika.BlockingConnection для публикующей стороны"""
+
+    broker: FakeBroker = None
+
+    def __init__(self, parameters=None):
+        self.is_open = True
+
+    def channel(self):
+        return FakeChannel(self.broker)
+
+    def close(self):
+        self.is_open = False
+
+
+def _load_module(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@dataclass
+class Stack:
+    auth_app: object
+    task_app: object
+    broker: FakeBroker
+    auth: object
+    task: object
+    notification: object
+    users: list = field(default_factory=list)
+
+
+def boot_stack(workdir: str, auth_database_url: str = None, task_database_url: str = None, rate_limit: bool = False) -> Stack:
+    """Загружает все три сервиса в текущий процесс. Можно вызвать только один раз"""
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["JWT_SECRET_KEY"] = BENCH_JWT_SECRET
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if rate_limit else "false"
+
+    import pika # type: ignore
+    broker = FakeBroker()
+    FakeBlockingConnection.broker = broker
+    pika.BlockingConnection = FakeBlockingConnection
+
+    os.environ["DATABASE_URL"] = auth_database_url or f"sqlite:///{os.path.join(workdir, 'auth.db')}"
+    sys.path.insert(0, os.path.join(ROOT, "auth_service"))
+    auth = _load_module("auth_main", os.path.join(ROOT, "auth_service", "main.py"))
+
+    os.environ["DATABASE_URL"] = task_database_url or f"sqlite:///{os.path.join(workdir, 'task.db')}"
+    sys.path.insert(0, os.path.join(ROOT, "task_service"))
+    task = _load_module("task_main", os.path.join(ROOT, "task_service", "main.py"))
+
+    sys.path.insert(0, os.path.join(ROOT, "notification_service"))
+    notification = _load_module("notification_main", os.path.join(ROOT, "notification_service", "main.py"))
+    broker.consume("task_notifications", notification.callback, on_idle=notification.flush_pending)
+
+    # Логи на каждый запрос искажают замеры
+    for name in ("AuthService", "TaskService", "NotificationService", "RateLimit", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    return Stack(auth_app=auth.app, task_app=task.app, broker=broker, auth=auth, task=task, notification=notification)
+
+
+def sync_id_sequence(conn, table):
+    """
+    Продвигает последовательность id в Postgres после вставки строк с явными id:
+    иначе следующий INSERT без id (например, /register) получит уже занятый id
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    from sqlalchemy import func, select, text # type: ignore
+
+    last_id = conn.execute(select(func.max(table.c.id))).scalar() or 0
+    conn.execute(
+        text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :value, :called)"),
+        {"table": table.name, "value": max(last_id, 1), "called": last_id > 0},
+    )
+
+
+def seed(stack: Stack, users: int, tasks_per_user: int, seed: int = 42, reset: bool = False):
+    """
+    Заполняет базы: users пользователей с одним общим паролем BENCH_PASSWORD
+    и tasks_per_user задач на каждого (разные сроки, важность и статусы).
+    Выполненные задачи получают completed_at в пределах последнего года.
+    Для каждого пользователя заранее выпускается JWT, чтобы сценарии чтения не зависели от /login.
+    Существующие данные удаляются только при reset=True, иначе непустые таблицы - ошибка
+    (защита от запуска на настоящей базе).
+    """
+    from app import models as auth_models, auth as auth_tokens
+    from app.database import engine as auth_engine
+    import models as task_models
+    from database import engine as task_engine
+    from passlib.context import CryptContext # type: ignore
+    from sqlalchemy import exists, select # type: ignore
+
+    tables = [
+        (auth_engine, auth_models.User.__table__),
+        (task_engine, task_models.TaskModel.__table__),
+        (task_engine, task_models.ArchivedTaskModel.__table__),
+    ]
+    if not reset:
+        with auth_engine.connect() as auth_conn, task_engine.connect() as task_conn:
+            conns = {auth_engine: auth_conn, task_engine: task_conn}
+            filled = [table.name for engine, table in tables if conns[engine].execute(select(exists().select_from(table))).scalar()]
+        if filled:
+            raise RuntimeError(
+                f"Таблицы не пустые ({', '.join(filled)}): данные бенчмарка заменят их содержимое. "
+                "Запустите с --reset, если базу можно очистить"
+            )
+
+    rnd = random.Random(seed)
+    hashed = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(BENCH_PASSWORD)
+    now = datetime.now()
+    today = date.today()
+
+    user_rows = [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "hashed_password": hashed,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(1, users + 1)
+    ]
+    with auth_engine.begin() as conn:
+        conn.execute(auth_models.User.__table__.delete())
+        conn.execute(auth_models.User.__table__.insert(), user_rows)
+        sync_id_sequence(conn, auth_models.User.__table__)
+
+    with task_engine.begin() as conn:
+        conn.execute(task_models.TaskModel.__table__.delete())
+        conn.execute(task_models.ArchivedTaskModel.__table__.delete())
+        chunk = []
+        for user_id in range(1, users + 1):
+            for n in range(tasks_per_user):
+                roll = rnd.random()
+                completed = rnd.random() < 0.6
+                chunk.append({
+                    "title": f"Задача {n} пользователя {user_id}",
+                    "description": "Описание " * rnd.randint(0, 20),
+                    "is_completed": completed,
+                    "is_important": rnd.random() < 0.2,
+                    "due_date": None if roll < 0.3 else today + timedelta(days=rnd.randint(-60, 60)),
+                    "user_id": user_id,
+                    "completed_at": now - timedelta(days=rnd.randint(0, 365)) if completed else None,
+                })
+                if len(chunk) >= 10_000:
+                    conn.execute(task_models.TaskModel.__table__.insert(), chunk)
+                    chunk = []
+        if chunk:
+            conn.execute(task_models.TaskModel.__table__.insert(), chunk)
+
+    stack.users = [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "token": auth_tokens.create_access_token({"sub": str(i), "username": f"user{i}"}, timedelta(hours=12)),
+        }
+        for i in range(1, users + 1)
+    ]
@@ -0,0 +1,163 @@
+"""
+Сценарии нагрузки и сбор статистики.
+
+Сценарий - асинхронная функция step(clients, rec, rnd, users), выполняющая одну
+итерацию (один или несколько HTTP-запросов через rec.request). Раннер запускает
+concurrency параллельных исполнителей на duration секунд и считает пропускную
+способность и перцентили задержки как по сценарию целиком, так и по операциям.
+"""
+import asyncio
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from stack import BENCH_PASSWORD
+
+
+def percentile(sorted_samples: list, p: float) -> float:
+    """Перцентиль методом nearest-rank по отсортированной выборке"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(latencies: list, elapsed: float, statuses: Counter) -> dict:
+    samples = sorted(latencies)
+    return {
+        "requests": len(samples),
+        "errors": sum(count for code, count in statuses.items() if code == 0 or code >= 400),
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(samples, 50) * 1000, 3),
+            "p95": round(percentile(samples, 95) * 1000, 3),
+            "p99": round(percentile(samples, 99) * 1000, 3),
+            "mean": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+            "max": round(samples[-1] * 1000, 3) if samples else 0.0,
+        },
+    }
+
+
+class Recorder:
+    """Выполняет запросы и запоминает задержку и статус каждого по имени операции"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.recording = True
+
+    async def request(self, client, op: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status_code = response.status_code
+        except Exception:
+            response, status_code = None, 0
+        if self.recording:
+            self.latencies[op].append(time.perf_counter() - started)
+            self.statuses[op][status_code] += 1
+        return response
+
+    def merge(self, other: "Recorder"):
+        """Добавляет замеры другого Recorder (например, из дочернего процесса нагрузки)"""
+        for op, samples in other.latencies.items():
+            self.latencies[op].extend(samples)
+        for op, statuses in other.statuses.items():
+            self.statuses[op].update(statuses)
+
+    def report(self, elapsed: float) -> dict:
+        all_latencies = [x for samples in self.latencies.values() for x in samples]
+        all_statuses = sum(self.statuses.values(), Counter())
+        result = summarize(all_latencies, elapsed, all_statuses)
+        result["operations"] = {
+            op: summarize(self.latencies[op], elapsed, self.statuses[op]) for op in sorted(self.latencies)
+        }
+        return result
+
+
+def _auth_headers(user: dict) -> dict:
+    return {"Authorization": f"Bearer {user['token']}"}
+
+
+async def login_storm(clients, rec, rnd, users):
+    """Массовый вход: bcrypt на каждом запросе"""
+    user = rnd.choice(users)
+    await rec.request(
+        clients["auth"], "login", "POST", "/login",
+        data={"username": user["username"], "password": BENCH_PASSWORD},
+    )
+
+
+async def poll_reads(clients, rec, rnd, users):
+    """Клиенты, которые постоянно перечитывают список своих задач"""
+    user = rnd.choice(users)
+    await rec.request(clients["task"], "list_tasks", "GET", "/tasks/", headers=_auth_headers(user))
+
+
+async def write_burst(clients, rec, rnd, users):
+    """Создание задачи, несколько правок, выполнение и удаление"""
+    user = rnd.choice(users)
+    headers = _auth_headers(user)
+    task = clients["task"]
+    response = await rec.request(
+        task, "create_task", "POST", "/tasks/", headers=headers,
+        json={"title": "Бенчмарк", "description": "Нагрузка", "is_important": rnd.random() < 0.2},
+    )
+    if response is None or response.status_code != 200:
+        return
+    task_id = response.json()["id"]
+    for n in range(rnd.randint(1, 3)):
+        await rec.request(task, "update_task", "PATCH", f"/tasks/{task_id}", headers=headers, json={"title": f"Правка {n}"})
+    await rec.request(task, "complete_task", "PATCH", f"/tasks/{task_id}/complete", headers=headers)
+    if rnd.random() < 0.5:
+        await rec.request(task, "delete_task", "DELETE", f"/tasks/{task_id}", headers=headers)
+
+
+async def filter_mix(clients, rec, rnd, users):
+    """Смесь фильтров: сегодня, неделя, без срока, просроченные"""
+    user = rnd.choice(users)
+    today = date.today()
+    params = rnd.choice([
+        {"start_date": today.isoformat()},
+        {"start_date": today.isoformat(), "end_date": (today + timedelta(days=7)).isoformat()},
+        {"no_deadline": "true"},
+        {"overdue": "true"},
+    ])
+    op = "filter_" + "_".join(sorted(params))
+    await rec.request(clients["task"], op, "GET", "/tasks/filter", headers=_auth_headers(user), params=params)
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "poll_reads": poll_reads,
+    "write_burst": write_burst,
+    "filter_mix": filter_mix,
+}
+
+
+async def run_scenario(step, clients, users, duration: float, concurrency: int, seed: int, warmup: float = 1.0) -> dict:
+    """Гоняет сценарий warmup + duration секунд; в отчет попадает только основная фаза"""
+    rec, elapsed = await collect_scenario(step, clients, users, duration, concurrency, seed, warmup)
+    return rec.report(elapsed)
+
+
+async def collect_scenario(step, clients, users, duration: float, concurrency: int, seed: int, warmup: float = 1.0):
+    """То же, что run_scenario, но возвращает сырые замеры (Recorder) и длительность основной фазы"""
+    rec = Recorder()
+    rec.recording = False
+    deadline = time.perf_counter() + warmup + duration
+
+    async def worker(n: int):
+        rnd = random.Random(seed * 1000 + n)
+        while time.perf_counter() < deadline:
+            await step(clients, rec, rnd, users)
+
+    workers = [asyncio.create_task(worker(n)) for n in range(concurrency)]
+    await asyncio.sleep(warmup)
+    rec.recording = True
+    started = time.perf_counter()
+    await asyncio.gather(*workers)
+    return rec, time.perf_counter() - started
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from typing import Optional
+
+# Приоритет статусов при объединении: "created" важнее всего - задача новая,
+# даже если ее успели несколько раз отредактировать
+STATUS_PRIORITY = {"created": 2, "completed": 1}
+
+
+class PendingEvent:
+    """Накопленное событие по одной задаче, ожидающее окончания окна"""
+    __slots__ = ("data", "status", "count", "deadline")
+
+    def __init__(self, data: dict, status: str, deadline: float):
+        self.data = data
+        self.status = status
+        self.count = 1
+        self.deadline = deadline
+
+
+class EventCoalescer:
+    """
+    Объединение событий задач по ключу (user_id, task_id).
+    Первое событие открывает окно длиной window секунд; все события внутри окна
+    схлопываются в одно уведомление с последним состоянием задачи.
+    Удаление отменяет ожидающие события: если задача была создана и удалена
+    в пределах окна, уведомлений не будет вовсе.
+    Число ожидающих ключей ограничено max_pending: при переполнении самое старое
+    событие отправляется досрочно. Класс не потокобезопасен - вызывается из одного потока.
+    """
+
+    def __init__(self, window: float = 5.0, max_pending: int = 10_000):
+        self.window = window
+        self.max_pending = max_pending
+        self._pending: OrderedDict = OrderedDict()
+        self.received = 0
+        self.emitted = 0
+        self.suppressed = 0
+        self.evicted = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, data: dict, now: float) -> list[dict]:
+        """Принимает событие и возвращает события, которые нужно отправить сразу"""
+        self.received += 1
+        status = str(data.get("status", "unknown")).lower()
+        task_id = data.get("task_id")
+        if self.window <= 0 or task_id is None:
+            return self._emit([data])
+
+        key = (data.get("user_id"), task_id)
+        entry: Optional[PendingEvent] = self._pending.get(key)
+
+        if status == "deleted":
+            if entry is None:
+                return self._emit([data])
+            del self._pending[key]
+            if entry.status == "created":
+                # Задача появилась и исчезла внутри окна - сообщать не о чем
+                self.suppressed += 2
+                return []
+            self.suppressed += 1
+            return self._emit([data])
+
+        if entry is not None:
+            entry.data = data
+            entry.count += 1
+            if STATUS_PRIORITY.get(status, 0) > STATUS_PRIORITY.get(entry.status, 0):
+                entry.status = status
+            self.suppressed += 1
+            return []
+
+        ready = []
+        if len(self._pending) >= self.max_pending:
+            _, oldest = self._pending.popitem(last=False)
+            self.evicted += 1
+            ready.append(self._finalize(oldest))
+        self._pending[key] = PendingEvent(data, status, now + self.window)
+        return self._emit(ready)
+
+    def flush_due(self, now: float) -> list[dict]:
+        """Возвращает события, у которых закончилось окно (ключи упорядочены по сроку)"""
+        ready = []
+        while self._pending:
+            key, entry = next(iter(self._pending.items()))
+            if entry.deadline > now:
+                break
+            del self._pending[key]
+            ready.append(self._finalize(entry))
+        return self._emit(ready)
+
+    def flush_all(self) -> list[dict]:
+        ready = [self._finalize(entry) for entry in self._pending.values()]
+        self._pending.clear()
+        return self._emit(ready)
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "emitted": self.emitted,
+            "suppressed": self.suppressed,
+            "evicted": self.evicted,
+            "pending": self.pending,
+        }
+
+    def _finalize(self, entry: PendingEvent) -> dict:
+        data = dict(entry.data)
+        data["status"] = entry.status
+        data["coalesced"] = entry.count
+        return data
+
+    def _emit(self, events: list[dict]) -> list[dict]:
+        self.emitted += len(events)
+        return events
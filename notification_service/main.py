@@ -1,7 +1,11 @@
 import pika # type: ignore
 import json
+import os
+import signal
+import sys
 import time
 import logging
+from coalescer import EventCoalescer
 
 # Настройка красивого вывода логов
 logging.basicConfig(
@@ -10,54 +14,110 @@ logging.basicConfig(
 )
 logger = logging.getLogger("NotificationService")
 
+# Окно объединения событий одной задачи (0 - отправлять каждое событие сразу)
+COALESCE_WINDOW_SECONDS = float(os.getenv("COALESCE_WINDOW_SECONDS", "5"))
+COALESCE_MAX_PENDING = int(os.getenv("COALESCE_MAX_PENDING", "10000"))
+STATS_INTERVAL_SECONDS = float(os.getenv("STATS_INTERVAL_SECONDS", "60"))
+
+coalescer = EventCoalescer(window=COALESCE_WINDOW_SECONDS, max_pending=COALESCE_MAX_PENDING)
+
+def notify(data: dict):
+    """Отправка одного уведомления (пока - запись в лог)"""
+    status = data.get("status", "unknown").lower()
+    task_title = data.get("title", "Без названия")
+    task_id = data.get("task_id", "?")
+    user_id = data.get("user_id", "?")
+    coalesced = data.get("coalesced", 1)
+    suffix = f" [объединено событий: {coalesced}]" if coalesced > 1 else ""
+
+    # Логика уведомлений в зависимости от статуса
+    if status == "created":
+        logger.info(f" [НОВАЯ ЗАДАЧА] Пользователь {user_id} создал задачу: '{task_title}' (ID: {task_id}){suffix}")
+
+    elif status == "completed":
+        logger.info(f" [ВЫПОЛНЕНО] Задача '{task_title}' (ID: {task_id}) пользователя {user_id} успешно ЗАВЕРШЕНА.{suffix}")
+
+    elif status == "deleted":
+        logger.info(f" [УДАЛЕНО] Задача '{task_title}' (ID: {task_id}) была УДАЛЕНА пользователем {user_id}.")
+
+    else:
+        logger.info(f" [УВЕДОМЛЕНИЕ] Задача '{task_title}': статус изменен на {status}{suffix}")
+
 def callback(ch, method, properties, body):
     try:
-        # Декодируем сообщение из RabbitMQ
+        # Декодируем сообщение из RabbitMQ и пропускаем через окно объединения
         data = json.loads(body)
-        status = data.get("status", "unknown").lower()
-        task_title = data.get("title", "Без названия")
-        task_id = data.get("task_id", "?")
-        user_id = data.get("user_id", "?")
-
-        # Логика уведомлений в зависимости от статуса
-        if status == "created":
-            logger.info(f" [НОВАЯ ЗАДАЧА] Пользователь {user_id} создал задачу: '{task_title}' (ID: {task_id})")
-        
-        elif status == "completed":
-            logger.info(f" [ВЫПОЛНЕНО] Задача '{task_title}' (ID: {task_id}) пользователя {user_id} успешно ЗАВЕРШЕНА.")
-        
-        elif status == "deleted":
-            logger.info(f" [УДАЛЕНО] Задача '{task_title}' (ID: {task_id}) была УДАЛЕНА пользователем {user_id}.")
-        
-        else:
-            logger.info(f" [УВЕДОМЛЕНИЕ] Задача '{task_title}': статус изменен на {status}")
-
+        for event in coalescer.add(data, time.monotonic()):
+            notify(event)
     except Exception as e:
         logger.error(f" Ошибка обработки сообщения: {e}")
 
+def flush_pending():
+    """Отправляет события, у которых закончилось окно объединения"""
+    for event in coalescer.flush_due(time.monotonic()):
+        try:
+            notify(event)
+        except Exception as e:
+            logger.error(f" Ошибка отправки уведомления: {e}")
+
+def flush_all_pending():
+    """Отправляет все накопленные события, не дожидаясь окончания окон"""
+    for event in coalescer.flush_all():
+        try:
+            notify(event)
+        except Exception as e:
+            logger.error(f" Ошибка отправки уведомления: {e}")
+
+def log_stats():
+    stats = coalescer.stats()
+    logger.info(
+        f" [СТАТИСТИКА] Получено: {stats['received']}, отправлено: {stats['emitted']}, "
+        f"подавлено: {stats['suppressed']}, досрочно (переполнение): {stats['evicted']}, "
+        f"в ожидании: {stats['pending']}"
+    )
+
 def start_worker():
+    # Как часто проверять окна объединения, пока нет новых сообщений
+    tick = min(1.0, COALESCE_WINDOW_SECONDS) if COALESCE_WINDOW_SECONDS > 0 else 1.0
+    # docker stop присылает SIGTERM: завершаемся через исключение, чтобы сработал finally
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        _consume_forever(tick)
+    finally:
+        # Сообщения уже подтверждены (auto_ack), поэтому накопленное отправляем перед выходом
+        flush_all_pending()
+        log_stats()
+
+def _consume_forever(tick: float):
+    last_stats = time.monotonic()
     while True:
         try:
             # Подключение к RabbitMQ
             connection = pika.BlockingConnection(pika.ConnectionParameters(host='rabbitmq'))
             channel = connection.channel()
-            
+
             # Объявляем ту же очередь, что и в Task Service
             channel.queue_declare(queue='task_notifications')
-            
+
             # Подписываемся на сообщения
             channel.basic_consume(
-                queue='task_notifications', 
-                on_message_callback=callback, 
+                queue='task_notifications',
+                on_message_callback=callback,
                 auto_ack=True
             )
-            
+
             logger.info('--- Notification Service запущен и ждет событий ---')
-            channel.start_consuming()
-            
+            # Вместо start_consuming: между пачками сообщений отправляем созревшие события
+            while True:
+                connection.process_data_events(time_limit=tick)
+                flush_pending()
+                if time.monotonic() - last_stats >= STATS_INTERVAL_SECONDS:
+                    log_stats()
+                    last_stats = time.monotonic()
+
         except Exception as e:
             logger.warning(" Соединение с RabbitMQ прервано. Повтор через 5 секунд...")
             time.sleep(5)
 
 if __name__ == "__main__":
-    start_worker()
\ No newline at end of file
+    start_worker()
@@ -0,0 +1,130 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import exists, func, inspect, insert, literal, select, text # type: ignore
+from models import TaskModel, ArchivedTaskModel, completed_at_index
+
+logger = logging.getLogger("TaskArchiver")
+
+# Колонки, которые переносятся из tasks в tasks_archive как есть
+ARCHIVED_COLUMNS = ["id", "title", "description", "is_completed", "is_important", "due_date", "user_id", "completed_at"]
+
+# Ключ advisory-блокировки Postgres: архивацию выполняет только один процесс
+ARCHIVE_LOCK_KEY = 0x7461736B  # "task"
+
+def prepare_schema(engine):
+    """
+    Добавляет колонку completed_at и индекс по ней в уже существующую таблицу tasks
+    (create_all не изменяет созданные ранее таблицы). Для задач, выполненных
+    до появления колонки, время выполнения считается равным моменту миграции.
+    На SQLite таблица tasks, созданная без AUTOINCREMENT, пересоздается с ним.
+    """
+    columns = {column["name"] for column in inspect(engine).get_columns("tasks")}
+    if "completed_at" not in columns:
+        logger.info("Добавление колонки tasks.completed_at")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE tasks ADD COLUMN completed_at TIMESTAMP"))
+            conn.execute(
+                text("UPDATE tasks SET completed_at = :now WHERE is_completed = :done"),
+                {"now": datetime.now(), "done": True},
+            )
+    if engine.dialect.name == "sqlite":
+        _enable_sqlite_autoincrement(engine)
+    completed_at_index.create(bind=engine, checkfirst=True)
+
+def _enable_sqlite_autoincrement(engine):
+    """
+    Пересоздает tasks с AUTOINCREMENT (ALTER TABLE в SQLite этого не умеет) и продвигает
+    счетчик id за максимальный id архива, чтобы новые задачи не получали id архивных
+    """
+    with engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tasks'")).scalar()
+        if "AUTOINCREMENT" in ddl.upper():
+            return
+        logger.info("Пересоздание таблицы tasks с AUTOINCREMENT")
+        table = TaskModel.__table__
+        names = ", ".join(column.name for column in table.columns)
+        conn.execute(text("ALTER TABLE tasks RENAME TO tasks_legacy"))
+        # Индексы переехали вместе с таблицей - освобождаем их имена для новой
+        for index in inspect(conn).get_indexes("tasks_legacy"):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        table.create(bind=conn)
+        conn.execute(text(f"INSERT INTO tasks ({names}) SELECT {names} FROM tasks_legacy"))
+        conn.execute(text("DROP TABLE tasks_legacy"))
+
+        last_id = max(
+            conn.execute(select(func.max(TaskModel.id))).scalar() or 0,
+            conn.execute(select(func.max(ArchivedTaskModel.id))).scalar() or 0,
+        )
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'tasks'"))
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', :seq)"), {"seq": last_id})
+
+class TaskArchiver:
+    """
+    Переносит выполненные задачи старше age_days из tasks в tasks_archive пачками по batch_size.
+    Каждая пачка - отдельная транзакция. На Postgres проход выполняет только процесс,
+    получивший advisory-блокировку (остальные воркеры gunicorn его пропускают);
+    строки дополнительно блокируются с SKIP LOCKED.
+    """
+
+    def __init__(self, session_factory, engine, age_days: int = 30, batch_size: int = 1000, max_batches: int = 100):
+        self.session_factory = session_factory
+        self.engine = engine
+        self.age_days = age_days
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+    def run_once(self) -> int:
+        """Выполняет один проход архивации. Возвращает число перенесенных задач"""
+        if self.engine.dialect.name != "postgresql":
+            return self._run_pass()
+
+        with self.engine.connect() as lock_conn:
+            if not lock_conn.execute(select(func.pg_try_advisory_lock(ARCHIVE_LOCK_KEY))).scalar():
+                return 0
+            try:
+                return self._run_pass()
+            finally:
+                lock_conn.execute(select(func.pg_advisory_unlock(ARCHIVE_LOCK_KEY)))
+                lock_conn.commit()
+
+    def _run_pass(self) -> int:
+        cutoff = datetime.now() - timedelta(days=self.age_days)
+        total = 0
+        for _ in range(self.max_batches):
+            moved = self._archive_batch(cutoff)
+            total += moved
+            if moved < self.batch_size:
+                break
+        if total:
+            logger.info(f"В архив перенесено задач: {total}")
+        return total
+
+    def _archive_batch(self, cutoff: datetime) -> int:
+        db = self.session_factory()
+        try:
+            # id, уже занятый в архиве (например, выданный повторно до перехода на
+            # AUTOINCREMENT), не переносим: иначе вся пачка падала бы на уникальности ключа
+            already_archived = exists().where(ArchivedTaskModel.id == TaskModel.id)
+            ids = [
+                row.id for row in db.query(TaskModel.id)
+                .filter(TaskModel.is_completed == True, TaskModel.completed_at < cutoff, ~already_archived)
+                .order_by(TaskModel.completed_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ]
+            if not ids:
+                return 0
+
+            source = select(
+                *[getattr(TaskModel, name) for name in ARCHIVED_COLUMNS],
+                literal(datetime.now()).label("archived_at"),
+            ).where(TaskModel.id.in_(ids))
+            db.execute(insert(ArchivedTaskModel).from_select(ARCHIVED_COLUMNS + ["archived_at"], source))
+            db.query(TaskModel).filter(TaskModel.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            return len(ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
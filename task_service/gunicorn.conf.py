@@ -0,0 +1,52 @@
+import math
+import os
+
+# Конфигурация gunicorn для production: несколько процессов uvicorn (uvloop + httptools).
+# Запуск: gunicorn -c gunicorn.conf.py main:app
+
+def available_cpus() -> int:
+    """Число доступных процессу ядер с учетом affinity и квоты cgroup (docker --cpus)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", available_cpus()))
+# Пул соединений БД каждого воркера получает долю общего бюджета DB_MAX_CONNECTIONS
+# (по умолчанию 80 на сервис, см. database.py) - для этого database.py должен знать число воркеров
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "worker.UvloopWorker"
+
+# Плавный перезапуск воркеров: после max_requests (+ случайный разброс, чтобы
+# воркеры не перезапускались одновременно) процесс дообрабатывает запросы и заменяется новым
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Приложение загружается один раз в мастере и разделяется воркерами через copy-on-write.
+# Ресурсы с сокетами (пул соединений БД, клиенты Redis/AMQP) не должны переживать fork:
+# пул сбрасывается в post_fork, остальное создается лениво или в startup-событии воркера.
+# Лимиты RateLimitMiddleware считаются в каждом процессе отдельно;
+# для общих лимитов задайте RATE_LIMIT_REDIS_URL.
+preload_app = True
+
+def when_ready(server):
+    # Закрываем соединения, открытые мастером при загрузке приложения
+    from database import engine
+    engine.dispose()
+
+def post_fork(server, worker):
+    # Не закрываем унаследованные сокеты (они принадлежат мастеру), а просто забываем их
+    from database import engine
+    engine.dispose(close=False)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request # type: ignore
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status, Request # type: ignore
 from fastapi.responses import JSONResponse # type: ignore
 from fastapi.security import OAuth2PasswordBearer # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
@@ -6,13 +6,16 @@ from fastapi.exceptions import RequestValidationError # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 from jose import JWTError, jwt # type: ignore
 import os
+import asyncio
 import logging
 from datetime import date
 from typing import Optional
 
-from database import get_db, engine
+from database import get_db, engine, SessionLocal
 import models, schemas
 from repositories import TaskRepository
+from rate_limit import RateLimitMiddleware, RateLimitConfig
+from archive import TaskArchiver, prepare_schema
 
 # 1. Настройка логирования
 logging.basicConfig(
@@ -23,6 +26,7 @@ logger = logging.getLogger("TaskService")
 
 # 2. Создание таблиц при запуске
 models.Base.metadata.create_all(bind=engine)
+prepare_schema(engine)
 
 # 3. Инициализация приложения
 app = FastAPI(title="Task Service API")
@@ -32,12 +36,33 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "super-secret-key")
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost:8001/login")
 
+# 5. Архивация выполненных задач
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() in ("1", "true", "yes")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+archiver = TaskArchiver(SessionLocal, engine, age_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE)
+
+# Ограничение нагрузки: полный список задач без пагинации - самый дорогой запрос.
+# Добавляется до CORS, чтобы ответы 429/503 тоже получали CORS-заголовки
+app.add_middleware(
+    RateLimitMiddleware,
+    config=RateLimitConfig.from_env(route_costs={
+        ("GET", "/tasks/"): 3,
+        ("GET", "/tasks/filter"): 2,
+    }),
+    jwt_secret=SECRET_KEY,
+    jwt_algorithm=ALGORITHM,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Курсор пагинации и Retry-After должны быть доступны браузерным клиентам
+    expose_headers=["X-Next-After-Id", "Retry-After"],
 )
 
 # ========== ОБРАБОТЧИКИ ОШИБОК ==========
@@ -90,11 +115,30 @@ def create_task(
 
 @app.get("/tasks/", response_model=list[schemas.TaskResponse])
 def get_my_tasks(
+    include_archived: bool = False,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    repo = TaskRepository(db)
+    return repo.get_all_by_user(current_user_id, include_archived=include_archived)
+
+@app.get("/tasks/archive", response_model=list[schemas.ArchivedTaskResponse])
+def get_archived_tasks(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
+    """
+    Архив выполненных задач. Для следующей страницы передайте after_id
+    из заголовка X-Next-After-Id (он есть, только если страница заполнена целиком).
+    """
     repo = TaskRepository(db)
-    return repo.get_all_by_user(current_user_id)
+    tasks = repo.get_archived(current_user_id, after_id=after_id, limit=limit)
+    if len(tasks) == limit:
+        response.headers["X-Next-After-Id"] = str(tasks[-1].id)
+    return tasks
 
 @app.get("/tasks/filter", response_model=list[schemas.TaskResponse])
 def filter_tasks(
@@ -155,6 +199,23 @@ def delete_task(
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Task deleted"}
 
+async def archive_loop():
+    """Периодически переносит старые выполненные задачи в архив (в пуле потоков)"""
+    while True:
+        try:
+            await asyncio.to_thread(archiver.run_once)
+        except Exception as e:
+            logger.error(f"Ошибка архивации задач: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
 @app.on_event("startup")
 async def startup_event():
-    logger.info("--- Task Service успешно запущен на порту 8002 ---")
\ No newline at end of file
+    if ARCHIVE_ENABLED:
+        app.state.archive_task = asyncio.create_task(archive_loop())
+    logger.info("--- Task Service успешно запущен на порту 8002 ---")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    archive_task = getattr(app.state, "archive_task", None)
+    if archive_task is not None:
+        archive_task.cancel()
\ No newline at end of file
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date # type: ignore
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Index # type: ignore
 from database import Base
 
 class TaskModel(Base):
     """Класс-сущность задачи для ORM SQLAlchemy (ООП представление таблицы)"""
     __tablename__ = "tasks"
+    # Без AUTOINCREMENT SQLite выдает max(id)+1, и id задачи, ушедшей в архив, достался бы новой
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -11,4 +13,32 @@ class TaskModel(Base):
     is_completed = Column(Boolean, default=False)
     is_important = Column(Boolean, default=False)  # НОВОЕ ПОЛЕ: отметка важности
     due_date = Column(Date, nullable=True)         # Опциональный срок выполнения
-    user_id = Column(Integer, nullable=False)      # ID пользователя из Auth Service
\ No newline at end of file
+    user_id = Column(Integer, nullable=False)      # ID пользователя из Auth Service
+    completed_at = Column(DateTime, nullable=True) # Когда задача была выполнена (для архивации)
+
+# Индекс для архиватора: только выполненные задачи (частичный, где БД это поддерживает)
+completed_at_index = Index(
+    "ix_tasks_completed_at",
+    TaskModel.completed_at,
+    postgresql_where=TaskModel.is_completed == True,
+    sqlite_where=TaskModel.is_completed == True,
+)
+
+class ArchivedTaskModel(Base):
+    """
+    Архив выполненных задач ("холодные" данные).
+    Задачи переносятся сюда фоновым архиватором с сохранением id
+    (id в tasks не переиспользуются, поэтому не пересекаются с архивом).
+    """
+    __tablename__ = "tasks_archive"
+    __table_args__ = (Index("ix_tasks_archive_user_id_id", "user_id", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    is_completed = Column(Boolean, default=True)
+    is_important = Column(Boolean, default=False)
+    due_date = Column(Date, nullable=True)
+    user_id = Column(Integer, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
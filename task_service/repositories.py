@@ -2,8 +2,8 @@ import pika # type: ignore
 import json
 from sqlalchemy.orm import Session # type: ignore
 from sqlalchemy import and_ # type: ignore
-from datetime import date
-from models import TaskModel
+from datetime import date, datetime
+from models import TaskModel, ArchivedTaskModel
 
 class TaskRepository:
     def __init__(self, db: Session):
@@ -60,6 +60,12 @@ class TaskRepository:
             for key, value in update_data.items():
                 if value is not None:
                     setattr(task, key, value)
+
+            # Время выполнения нужно архиватору, чтобы определить возраст задачи
+            if task.is_completed and task.completed_at is None:
+                task.completed_at = datetime.now()
+            elif not task.is_completed:
+                task.completed_at = None
             
             self.db.commit()
             self.db.refresh(task)
@@ -67,11 +73,23 @@ class TaskRepository:
             return task
         return None
 
-    def get_all_by_user(self, user_id: int):
-        """Получение всех задач с сортировкой"""
-        return self.db.query(TaskModel).filter(
+    def get_all_by_user(self, user_id: int, include_archived: bool = False):
+        """Получение всех задач с сортировкой (архивные - в конце списка, только по запросу)"""
+        tasks = self.db.query(TaskModel).filter(
             TaskModel.user_id == user_id
         ).order_by(TaskModel.is_important.desc(), TaskModel.due_date.asc()).all()
+        if include_archived:
+            tasks += self.db.query(ArchivedTaskModel).filter(
+                ArchivedTaskModel.user_id == user_id
+            ).order_by(ArchivedTaskModel.id).all()
+        return tasks
+
+    def get_archived(self, user_id: int, after_id: int = None, limit: int = 100):
+        """Страница архивных задач пользователя (keyset-пагинация по id)"""
+        query = self.db.query(ArchivedTaskModel).filter(ArchivedTaskModel.user_id == user_id)
+        if after_id is not None:
+            query = query.filter(ArchivedTaskModel.id > after_id)
+        return query.order_by(ArchivedTaskModel.id).limit(limit).all()
 
     def get_filtered_tasks(self, user_id: int, start_date: date = None, end_date: date = None, no_deadline: bool = False, overdue: bool = False):
         """Строгая фильтрация по категориям"""
@@ -103,6 +121,13 @@ class TaskRepository:
             TaskModel.user_id == user_id
         ).first()
         
+        if task is None:
+            # Задача могла уже уйти в архив
+            task = self.db.query(ArchivedTaskModel).filter(
+                ArchivedTaskModel.id == task_id,
+                ArchivedTaskModel.user_id == user_id
+            ).first()
+
         if task:
             task_title = task.title 
             self.db.delete(task)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field # type: ignore
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 class TaskBase(BaseModel):
     """Базовая схема задачи"""
@@ -41,4 +41,9 @@ class TaskResponse(TaskBase):
     user_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ArchivedTaskResponse(TaskResponse):
+    """Схема архивной задачи"""
+    completed_at: Optional[datetime] = None
+    archived_at: datetime